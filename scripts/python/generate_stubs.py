@@ -4,67 +4,106 @@ Improved stub generation for PyOpenSim using mypy's stubgen with post-processing
 Fixes common SWIG-related issues in generated stubs.
 """
 
+import argparse
+import concurrent.futures
+import importlib.util
+import logging
+import mmap
+import os
 import re
+import shutil
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, TextIO, Tuple
+
+log = logging.getLogger("stubgen")
+
+# Compiled once at import time; the fixers below run over every generated stub.
+# Matches malformed self parameters like selfProperty, selfos, selfX_BD, etc.
+_RE_SELF_FUSED = re.compile(r'\bself(?=[A-Za-z_])([A-Za-z_0-9]*)')
+_RE_DUP_SELF = re.compile(r'\bself,[^\S\n]*self,[^\S\n]*')
+_RE_SELF_SUSPECT = re.compile(r'\bself(?:[A-Za-z_]|,[^\S\n]*self,)')
+# File-level version of the _apply_line_fixes probes, run over raw bytes;
+# a lone '@overload' line (the normal case) needs no fix
+_RE_NEEDS_FIX_BYTES = re.compile(
+    rb'\(\)|, \)|@overload[^\S\n]*def|' + _RE_SELF_SUSPECT.pattern.encode())
+
+# All line-level SWIG fixes as one alternation, so each line is scanned once
+# and _dispatch_fix picks the rewrite from the alternative that matched:
+#   overload - '@overload' and 'def' run together on one line
+#   sig      - a def signature whose parameters need fixing (empty, selfX,
+#              'self, self,' or a trailing comma); clean signatures never match
+#   self_cat - malformed self parameter anywhere else on the line (method
+#              names such as selfCollide are left alone)
+#   dup      - duplicated self anywhere else on the line
+# Every match changes the line, so subn() counts are exact change counts.
+# Whitespace is matched with [^\S\n] so no match can swallow the line's newline.
+_RE_STUB_FIXES = re.compile(r'''
+      (?P<overload>@overload[^\S\n]*def\ (?P<ov_name>\w+)\((?=self|\))(?P<ov_params>[^)]*)\)
+                   (?P<ov_ret>[^:]*):(?P<ov_rest>.*)$)
+    | (?P<sig>def\ (?P<name>\w+)\(
+              (?=\)|[^)]*(?:\bself[A-Za-z_]|\bself,[^\S\n]*self,|,\ \)))
+              (?P<params>[^)]*)\))
+    | (?P<self_cat>(?<!def\ )\bself(?=[A-Za-z_])(?P<self_rest>[A-Za-z_0-9]*))
+    | (?P<dup>\bself,[^\S\n]*self,[^\S\n]*)
+''', re.MULTILINE | re.VERBOSE)
+
+# fix_missing_type_imports only looks at (and edits) this many leading lines
+STUB_HEADER_LINES = 10
+
+# Canonical package-level stub, kept next to the runtime __init__.py
+INIT_STUB_SOURCE = Path(__file__).resolve().parents[2] / "src" / "pyopensim" / "__init__.pyi"
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Send progress messages to stdout; --quiet raises the level to WARNING."""
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stdout)
 
 
 def ensure_mypy_available() -> bool:
     """Check if mypy is available, install if needed."""
+    # Only probe for the module; stubgen itself runs in child processes, so
+    # importing mypy here would be pure overhead
     try:
-        import mypy.stubgen  # noqa: F401
-        print("[OK] mypy is available")
-        return True
+        found = importlib.util.find_spec("mypy.stubgen") is not None
     except ImportError:
-        print("Installing mypy for stub generation...")
-        try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "mypy"], check=True)
-            print("[OK] mypy installed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed to install mypy: {e}")
-            return False
-
-
-def fix_malformed_self_parameters(content: str) -> str:
-    """Fix malformed self parameters in stub content."""
-    # Pattern to match malformed self parameters like selfProperty, selfos, selfX_BD, etc.
-    # This matches 'self' followed immediately by a capital letter or lowercase letter(s)
-    patterns = [
-        # Fix selfCamelCase -> self, CamelCase
-        (r'\bself([A-Z][a-zA-Z_0-9]*)', r'self, \1'),
-        # Fix selflowercase -> self, lowercase  
-        (r'\bself([a-z][a-zA-Z_0-9]*)', r'self, \1'),
-        # Fix selfX_Y style parameters -> self, X_Y
-        (r'\bself([A-Z_][A-Z_0-9]*)', r'self, \1'),
-    ]
+        found = False
     
-    fixed_content = content
-    for pattern, replacement in patterns:
-        fixed_content = re.sub(pattern, replacement, fixed_content)
+    if found:
+        log.info("[OK] mypy is available")
+        return True
     
-    return fixed_content
-
+    log.info("Installing mypy for stub generation...")
+    try:
+        subprocess.run([sys.executable, "-m", "pip", "install", "mypy"], check=True)
+        log.info("[OK] mypy installed successfully")
+        return True
+    except subprocess.CalledProcessError as e:
+        log.error("[ERROR] Failed to install mypy: %s", e)
+        return False
 
-def fix_duplicate_self_parameters(content: str) -> str:
-    """Fix cases where self appears twice like 'self, self, param'."""
-    # Fix patterns like "self, self, param" -> "self, param"
-    content = re.sub(r'\bself,\s*self,\s*', 'self, ', content)
-    return content
 
+def fix_missing_type_imports(content: str, uses_any: Optional[bool] = None) -> Tuple[str, int]:
+    """Add missing type imports that are commonly needed.
 
-def fix_missing_type_imports(content: str) -> str:
-    """Add missing type imports that are commonly needed."""
+    ``uses_any`` says whether 'Any' appears anywhere in the stub; pass it when
+    ``content`` is only the header of the file. Returns the new content and
+    the number of changes made.
+    """
     lines = content.split('\n')
+    if uses_any is None:
+        uses_any = 'Any' in content
     
-    # Check if we need to add imports
-    has_typing_import = any('from typing import' in line for line in lines[:10])
-    has_any_import = any('Any' in line for line in lines[:10])
+    # Check if we need to add imports (only the header lines matter)
+    head = '\n'.join(lines[:STUB_HEADER_LINES])
+    has_typing_import = 'from typing import' in head
+    has_any_import = 'Any' in head
     
     # If we have type annotations but no typing imports, add them
-    if 'Any' in content and not has_any_import:
+    n_changes = 0
+    if uses_any and not has_any_import:
         if has_typing_import:
             # Find the typing import line and add Any to it
             for i, line in enumerate(lines):
@@ -75,211 +114,276 @@ def fix_missing_type_imports(content: str) -> str:
                             lines[i] = line + ' Any'
                         else:
                             lines[i] = line + ', Any'
+                        n_changes = 1
                     break
         else:
             # Add new typing import
             lines.insert(0, 'from typing import Any')
+            n_changes = 1
     
-    return '\n'.join(lines)
-
-
-def fix_common_swig_issues(content: str) -> str:
-    """Fix common SWIG-generated stub issues."""
-    # Fix empty parameter lists that should have self
-    content = re.sub(r'def (\w+)\(\)', r'def \1(self)', content)
+    return '\n'.join(lines), n_changes
+
+
+def _fix_params(params: str) -> str:
+    """Fix the parameter list of a single def signature."""
+    # Split selfX into 'self, X', then collapse 'self, self,' into 'self,'
+    params = _RE_SELF_FUSED.sub(r'self, \1', params)
+    params = _RE_DUP_SELF.sub('self, ', params)
+    if not params:
+        # Empty parameter lists should have self
+        params = 'self'
+    elif params.endswith(', '):
+        # Trailing comma
+        params = params[:-2]
+    return params
+
+
+def _dispatch_fix(m: 're.Match[str]') -> str:
+    """Return the replacement for one _RE_STUB_FIXES match."""
+    kind = m.lastgroup
+    if kind == 'sig':
+        return f"def {m['name']}({_fix_params(m['params'])})"
+    if kind == 'overload':
+        params = _fix_params(m['ov_params'])
+        ret = _RE_STUB_FIXES.sub(_dispatch_fix, m['ov_ret'])
+        rest = _RE_STUB_FIXES.sub(_dispatch_fix, m['ov_rest'])
+        # Put the decorator back on its own line
+        return f"@overload\n    def {m['ov_name']}({params}){ret}:{rest}"
+    if kind == 'self_cat':
+        return f"self, {m['self_rest']}"
+    return 'self, '
+
+
+def _apply_line_fixes(line: str) -> Tuple[str, int]:
+    """Apply all line-local fixes in a single regex pass.
+
+    Returns the fixed line and the number of fixes applied.
+    """
+    # Most lines are already clean; these probes are cheaper than the
+    # alternation and cover every way it can rewrite a line
+    if ('()' in line or ', )' in line or '@overload' in line
+            or _RE_SELF_SUSPECT.search(line)):
+        return _RE_STUB_FIXES.subn(_dispatch_fix, line)
+    return line, 0
+
+
+def _stub_needs_fixes(file_path: Path) -> bool:
+    """Cheaply check whether any fix could apply, without decoding the stub."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if _RE_NEEDS_FIX_BYTES.search(mm):
+                return True
+            # An import is only added when Any is used but not in the header
+            any_pos = mm.find(b'Any')
+            if any_pos == -1:
+                return False
+            header_end = 0
+            for _ in range(STUB_HEADER_LINES):
+                header_end = mm.find(b'\n', header_end) + 1
+                if header_end == 0:
+                    return False  # the whole file is header
+            return any_pos >= header_end
+
+
+def _stream_fixes(fin: TextIO, fout: TextIO) -> int:
+    """Copy a stub from fin to fout with all fixes applied; return the number of fixes."""
+    # Only the header is buffered, since that is where imports get added
+    head = []
+    for _ in range(STUB_HEADER_LINES):
+        line = fin.readline()
+        if not line:
+            break
+        head.append(line)
     
-    # Fix malformed overload decorators
-    content = re.sub(r'@overload\s*def (\w+)\(self([^)]*)\)([^:]*):(.*)$', 
-                     r'@overload\n    def \1(self\2)\3:\4', content, flags=re.MULTILINE)
+    uses_any = any('Any' in line for line in head)
+    if not uses_any:
+        # Rare case: scan the rest for 'Any' one line at a time, then rewind
+        body_start = fin.tell()
+        while line := fin.readline():
+            if 'Any' in line:
+                uses_any = True
+                break
+        fin.seek(body_start)
     
-    # Fix trailing commas in parameter lists
-    content = re.sub(r'def (\w+)\([^)]*,\s*\)', lambda m: m.group(0).replace(', )', ')'), content)
+    total = 0
+    fixed_head = []
+    for line in head:
+        fixed, n = _apply_line_fixes(line)
+        fixed_head.append(fixed)
+        total += n
+    fixed_head = ''.join(fixed_head)
+    if uses_any:
+        fixed_head, n = fix_missing_type_imports(fixed_head, uses_any=True)
+        total += n
+    fout.write(fixed_head)
     
-    return content
+    for line in fin:
+        fixed, n = _apply_line_fixes(line)
+        fout.write(fixed)
+        total += n
+    
+    return total
 
 
 def post_process_stub_file(file_path: Path) -> None:
     """Post-process a generated stub file to fix common issues."""
-    print(f"  Post-processing: {file_path.name}")
+    log.info("  Post-processing: %s", file_path.name)
     
+    tmp_path = None
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Most stubs are already clean; leave those without reading them as text
+        if not _stub_needs_fixes(file_path):
+            log.info("    [OK] No issues found in %s", file_path.name)
+            return
+        
+        # Stream line by line into a sibling temp file so memory stays O(line)
+        with open(file_path, 'r', encoding='utf-8') as fin, \
+                tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=file_path.parent,
+                                            suffix='.tmp', delete=False) as fout:
+            tmp_path = fout.name
+            n_changes = _stream_fixes(fin, fout)
         
-        # Apply all fixes
-        original_content = content
-        content = fix_malformed_self_parameters(content)
-        content = fix_duplicate_self_parameters(content)
-        content = fix_missing_type_imports(content)
-        content = fix_common_swig_issues(content)
+        # Only replace the original if a fix was applied; every counted fix
+        # changes the text, so no string comparison is needed
+        if n_changes:
+            shutil.copymode(file_path, tmp_path)
+            os.replace(tmp_path, file_path)
+            log.info("    [OK] Fixed issues in %s", file_path.name)
+        else:
+            os.unlink(tmp_path)
+            log.info("    [OK] No issues found in %s", file_path.name)
+
+    except Exception as e:
+        log.error("    [ERROR] Error processing %s: %s", file_path.name, e)
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _run_one_stubgen(module_name: str, output_dir: Path) -> bool:
+    """Run stubgen for a single module in its own subprocess."""
+    try:
+        result = subprocess.run([
+            sys.executable, "-m", "mypy.stubgen",
+            "-m", module_name,
+            "-o", str(output_dir),
+            "--ignore-errors"
+        ], capture_output=True, text=True, check=False)
         
-        # Only write back if content changed
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"    [OK] Fixed issues in {file_path.name}")
+        if result.returncode == 0:
+            log.info("  [OK] Generated stubs for %s", module_name)
         else:
-            print(f"    [OK] No issues found in {file_path.name}")
+            log.warning("  [WARN] Warning: stubgen had issues with %s", module_name)
+            if result.stderr:
+                log.warning("    stderr: %s", result.stderr)
+        # Still count as success since stubs are usually generated despite warnings
+        return True
 
     except Exception as e:
-        print(f"    [ERROR] Error processing {file_path.name}: {e}")
+        log.error("  [ERROR] Error generating stubs for %s: %s", module_name, e)
+        return False
 
 
 def generate_stubs_with_stubgen(package_path: Path, output_dir: Path) -> bool:
     """Generate stub files using mypy's stubgen."""
-    print(f"Generating stubs for package at: {package_path}")
+    log.info("Generating stubs for package at: %s", package_path)
     
     # Add the package directory to Python path
     if package_path and package_path.exists():
         sys.path.insert(0, str(package_path.parent))
     
+    # Walk the whole package in one stubgen process so mypy and the SWIG
+    # libraries are only loaded once
+    log.info("Generating stubs for package pyopensim...")
+    try:
+        result = subprocess.run([
+            sys.executable, "-m", "mypy.stubgen",
+            "-p", "pyopensim",
+            "-o", str(output_dir),
+            "--ignore-errors"
+        ], capture_output=True, text=True, check=False)
+        
+        if result.returncode == 0:
+            log.info("  [OK] Generated stubs for pyopensim")
+            return True
+        log.warning("  [WARN] Warning: package stubgen failed, falling back to per-module runs")
+        if result.stderr:
+            log.warning("    stderr: %s", result.stderr)
+
+    except Exception as e:
+        log.warning("  [WARN] Warning: package stubgen failed (%s), falling back to per-module runs", e)
+    
     # PyOpenSim modules to generate stubs for
     modules = ['simbody', 'common', 'simulation', 'actuators', 'analyses', 'tools']
+    module_names = [f"pyopensim.{module}" for module in modules]
+    log.info("Generating stubs for %s...", ', '.join(module_names))
     
-    success_count = 0
+    # Each stubgen run is its own process writing its own .pyi, so threads
+    # only wait on the children and the runs overlap. stubgen creates the
+    # package directory with a racy isdir()/makedirs() check, so create it first
+    (output_dir / "pyopensim").mkdir(parents=True, exist_ok=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(module_names)) as ex:
+        results = list(ex.map(lambda name: _run_one_stubgen(name, output_dir), module_names))
     
-    for module in modules:
-        module_name = f"pyopensim.{module}"
-        print(f"Generating stubs for {module_name}...")
-        
-        try:
-            # Run stubgen for this module
-            result = subprocess.run([
-                sys.executable, "-m", "mypy.stubgen",
-                "-m", module_name,
-                "-o", str(output_dir),
-                "--ignore-errors"
-            ], capture_output=True, text=True, check=False)
-            
-            if result.returncode == 0:
-                print(f"  [OK] Generated stubs for {module_name}")
-                success_count += 1
-            else:
-                print(f"  [WARN] Warning: stubgen had issues with {module_name}")
-                if result.stderr:
-                    print(f"    stderr: {result.stderr}")
-                # Still count as success since stubs are usually generated despite warnings
-                success_count += 1
-
-        except Exception as e:
-            print(f"  [ERROR] Error generating stubs for {module_name}: {e}")
-    
-    return success_count > 0
+    return any(results)
 
 
 def post_process_all_stubs(output_dir: Path) -> None:
     """Post-process all generated stub files."""
-    print("Post-processing generated stub files...")
+    log.info("Post-processing generated stub files...")
     
     # Find all .pyi files in the pyopensim directory
     pyopensim_dir = output_dir / "pyopensim"
     if pyopensim_dir.exists():
-        stub_files = list(pyopensim_dir.glob("*.pyi"))
-        for stub_file in stub_files:
-            if stub_file.name != "__init__.pyi":  # Skip our custom __init__.pyi
+        # Skip our custom __init__.pyi; every other stub is independent
+        stub_files = [f for f in pyopensim_dir.glob("*.pyi") if f.name != "__init__.pyi"]
+        
+        # A couple of stubs are cheaper to fix in-process than to start a pool for
+        if len(stub_files) <= 2:
+            for stub_file in stub_files:
                 post_process_stub_file(stub_file)
+        else:
+            # Workers need the same logging setup (spawned ones do not inherit it)
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(len(stub_files), os.cpu_count() or 1),
+                    initializer=configure_logging,
+                    initargs=(log.getEffectiveLevel(),)) as ex:
+                list(ex.map(post_process_stub_file, stub_files))
     else:
-        print(f"  [WARN] Warning: Expected stub directory not found: {pyopensim_dir}")
+        log.warning("  [WARN] Warning: Expected stub directory not found: %s", pyopensim_dir)
 
 
 def create_init_stub(output_dir: Path) -> None:
     """Create the main __init__.pyi file with proper imports and exports.
 
-    This creates a comprehensive stub that matches the runtime behavior of __init__.py,
-    enabling IDE autocomplete for both structured imports (pyopensim.simulation.Model)
-    and flat imports (pyopensim.Model).
+    The hand-maintained src/pyopensim/__init__.pyi is the single source of truth;
+    it matches the runtime behavior of __init__.py, enabling IDE autocomplete for
+    both structured imports (pyopensim.simulation.Model) and flat imports
+    (pyopensim.Model).
     """
-    init_stub_content = '''from typing import Any
-from . import actuators, analyses, common, simbody, simulation, tools
-
-# Version is imported from package metadata
-__version__: str
-__opensim_version__: str
-
-# Optional modules - mirror the runtime try/except behavior
-try:
-    from . import examplecomponents
-except ImportError:
-    examplecomponents = None
-
-try:
-    from . import moco
-except ImportError:
-    moco = None
-
-try:
-    from . import report
-except ImportError:
-    report = None
-
-# Re-exported classes from simbody
-from .simbody import Vec3, Rotation, Transform, Inertia, Gray, SimTK_PI
-
-# Re-exported classes from common
-from .common import Component, Property, Storage, Array, StepFunction, ConsoleReporter
-
-# Re-exported classes from simulation
-from .simulation import (
-    Model,
-    Manager,
-    State,
-    Body,
-    PinJoint,
-    PhysicalOffsetFrame,
-    Ellipsoid,
-    Millard2012EquilibriumMuscle,
-    PrescribedController,
-    InverseKinematicsSolver,
-    InverseDynamicsSolver
-)
-
-# Re-exported classes from actuators
-from .actuators import Muscle, CoordinateActuator, PointActuator
-
-# Re-exported classes from tools
-from .tools import InverseKinematicsTool, InverseDynamicsTool, ForwardTool, AnalyzeTool
-
-__all__ = [
-    # Core modules
-    'simbody', 'common', 'simulation', 'actuators', 'analyses', 'tools',
-    # Optional modules (if available)
-    'examplecomponents', 'moco', 'report',
-    # Common classes at top level for convenience
-    'Model', 'Manager', 'State', 'Body',
-    'Component', 'Property',
-    'Vec3', 'Rotation', 'Transform', 'Inertia',
-    'PinJoint', 'PhysicalOffsetFrame', 'Ellipsoid',
-    'Millard2012EquilibriumMuscle', 'PrescribedController',
-    'StepFunction', 'ConsoleReporter',
-    'Gray', 'SimTK_PI',
-    'Storage', 'Array',
-    'InverseKinematicsSolver', 'InverseDynamicsSolver',
-    'Muscle', 'CoordinateActuator', 'PointActuator',
-    'InverseKinematicsTool', 'InverseDynamicsTool',
-    'ForwardTool', 'AnalyzeTool',
-    '__version__', '__opensim_version__'
-]
-'''
-
     init_file = output_dir / "pyopensim" / "__init__.pyi"
     init_file.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(init_file, 'w') as f:
-        f.write(init_stub_content)
+    shutil.copyfile(INIT_STUB_SOURCE, init_file)
 
-    print("[OK] Generated main __init__.pyi")
+    log.info("[OK] Generated main __init__.pyi")
 
 
 def main():
     """Main stub generation function."""
-    if len(sys.argv) < 2:
-        print("Usage: generate_stubs.py <output_dir> [package_path]")
-        print("  output_dir: Directory where .pyi files will be created")
-        print("  package_path: Optional path to built pyopensim package")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate .pyi stubs for pyopensim.")
+    parser.add_argument("output_dir", type=Path,
+                        help="Directory where .pyi files will be created")
+    parser.add_argument("package_path", type=Path, nargs="?", default=None,
+                        help="Optional path to built pyopensim package")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Only report warnings and errors")
+    args = parser.parse_args()
+    configure_logging(logging.WARNING if args.quiet else logging.INFO)
     
-    output_dir = Path(sys.argv[1])
-    package_path = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    output_dir = args.output_dir
+    package_path = args.package_path
     
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -288,28 +392,30 @@ def main():
     if not ensure_mypy_available():
         sys.exit(1)
     
-    print("\n" + "="*60)
-    print("PYOPENSIM STUB GENERATION")
-    print("="*60)
+    log.info("\n" + "="*60)
+    log.info("PYOPENSIM STUB GENERATION")
+    log.info("="*60)
     
     # Generate stubs using stubgen
     if generate_stubs_with_stubgen(package_path, output_dir):
-        print("\n" + "-"*40)
+        log.info("\n" + "-"*40)
         # Post-process the generated stubs to fix issues
         post_process_all_stubs(output_dir)
         
-        print("\n" + "-"*40)
+        log.info("\n" + "-"*40)
         # Create main __init__.pyi file
         create_init_stub(output_dir)
 
-        print("\n" + "="*60)
-        print(f"[OK] Stub generation completed successfully!")
-        print(f"  Files written to: {output_dir}")
-        print(f"  Post-processing applied to fix SWIG-related issues")
-        print("="*60)
+        log.info("\n" + "="*60)
+        log.info("[OK] Stub generation completed successfully!")
+        log.info("  Files written to: %s", output_dir)
+        log.info("  Post-processing applied to fix SWIG-related issues")
+        log.info("="*60)
     else:
-        print("[ERROR] Stub generation failed")
+        log.error("[ERROR] Stub generation failed")
         sys.exit(1)
+    
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":
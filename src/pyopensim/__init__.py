@@ -11,17 +11,20 @@ import ctypes
 import atexit
 
 # Get the current directory
-_curFolder = os.path.dirname(os.path.realpath(__file__))
-_lib_path = os.path.join(_curFolder, 'lib')
+# (no realpath needed: lib/ is installed next to this file)
+_curFolder = os.path.dirname(os.path.abspath(__file__))
+_lib_path = f'{_curFolder}{os.sep}lib'
+
+_have_libdir = os.path.isdir(_lib_path)
 
 # Set up library loading - CRITICAL: must be done before importing SWIG modules
 if sys.platform.startswith('win'):
     # Windows: add DLL directory
-    if os.path.exists(_lib_path):
+    if _have_libdir:
         os.add_dll_directory(_lib_path)
 else:
     # Unix-like: preload essential libraries and update LD_LIBRARY_PATH
-    if os.path.exists(_lib_path):
+    if _have_libdir:
         # Add to LD_LIBRARY_PATH for subprocess
         if 'LD_LIBRARY_PATH' in os.environ:
             os.environ['LD_LIBRARY_PATH'] = _lib_path + os.pathsep + os.environ['LD_LIBRARY_PATH']
@@ -31,118 +34,97 @@ else:
         # Preload critical libraries in correct order
         # Use platform-appropriate library extension
         lib_ext = '.dylib' if sys.platform == 'darwin' else '.so'
+        # SWIG resolves these symbols immediately anyway, so bind eagerly
+        _dl_mode = ctypes.RTLD_GLOBAL | getattr(os, 'RTLD_NOW', 0x2)
         try:
-            ctypes.CDLL(os.path.join(_lib_path, f'libSimTKcommon{lib_ext}'), mode=ctypes.RTLD_GLOBAL)
-            ctypes.CDLL(os.path.join(_lib_path, f'libSimTKmath{lib_ext}'), mode=ctypes.RTLD_GLOBAL)
-            ctypes.CDLL(os.path.join(_lib_path, f'libSimTKsimbody{lib_ext}'), mode=ctypes.RTLD_GLOBAL)
+            for _lib_name in ('libSimTKcommon', 'libSimTKmath', 'libSimTKsimbody'):
+                ctypes.CDLL(f'{_lib_path}/{_lib_name}{lib_ext}', mode=_dl_mode)
         except OSError as e:
             print(f"Warning: Could not preload SimTK libraries: {e}")
 
-# Make pyopensim appear as opensim for SWIG module compatibility
-import sys
-sys.modules['opensim'] = sys.modules[__name__]
-
-# Import SWIG-generated modules as submodules (preserving structure)
-try:
-    from . import simbody
-except ImportError as e:
-    print(f"Warning: Could not import simbody module: {e}")
-    simbody = None
-
-try:
-    from . import common
-except ImportError as e:
-    print(f"Warning: Could not import common module: {e}")
-    common = None
-
-try:
-    from . import simulation
-except ImportError as e:
-    print(f"Warning: Could not import simulation module: {e}")
-    simulation = None
-
-try:
-    from . import actuators
-except ImportError as e:
-    print(f"Warning: Could not import actuators module: {e}")
-    actuators = None
-
-try:
-    from . import analyses
-except ImportError as e:
-    print(f"Warning: Could not import analyses module: {e}")
-    analyses = None
-
-try:
-    from . import tools
-except ImportError as e:
-    print(f"Warning: Could not import tools module: {e}")
-    tools = None
-
-# Try to import optional modules
-try:
-    from . import examplecomponents
-except ImportError:
-    examplecomponents = None  # Optional module
+# Make pyopensim appear as opensim for SWIG module compatibility, without
+# shadowing a real opensim package that is already imported. This has to run
+# at package import: `import pyopensim.simulation` loads SWIG modules without
+# going through the lazy __getattr__ below.
+sys.modules.setdefault('opensim', sys.modules[__name__])
 
-try:
-    from . import moco
-except ImportError:
-    moco = None  # Optional module
-
-try:
-    from . import report
-except ImportError:
-    report = None  # Optional module
+# SWIG-generated modules are imported lazily (PEP 562) on first attribute
+# access, so `import pyopensim` only pays for the libraries actually used
+_SUBMODULES = ('simbody', 'common', 'simulation', 'actuators', 'analyses', 'tools')
+_OPTIONAL_SUBMODULES = ('examplecomponents', 'moco', 'report')
+_LAZY = frozenset(_SUBMODULES + _OPTIONAL_SUBMODULES)
 
 # For backwards compatibility with OpenSim's flat namespace,
-# also import commonly used classes at the top level
-if simbody:
+# commonly used classes are also available at the top level
+_REEXPORTS = {
     # SimTK and geometry classes from simbody
-    for cls_name in ['Vec3', 'Rotation', 'Transform', 'Inertia', 'Gray', 'SimTK_PI']:
-        try:
-            cls = getattr(simbody, cls_name)
-            globals()[cls_name] = cls
-        except AttributeError:
-            pass  # Class doesn't exist in this module
-
-if common:
+    'simbody': ('Vec3', 'Rotation', 'Transform', 'Inertia', 'Gray', 'SimTK_PI'),
     # Core modeling classes
-    for cls_name in ['Component', 'Property', 'Storage', 'Array', 'StepFunction', 'ConsoleReporter']:
-        try:
-            cls = getattr(common, cls_name)
-            globals()[cls_name] = cls
-        except AttributeError:
-            pass  # Class doesn't exist in this module
-
-if simulation:
-    # Simulation classes - import each individually to avoid failures
-    for cls_name in ['Model', 'Manager', 'State', 'Body', 'PinJoint', 'PhysicalOffsetFrame', 
-                     'Ellipsoid', 'Millard2012EquilibriumMuscle', 'PrescribedController',
-                     'InverseKinematicsSolver', 'InverseDynamicsSolver']:
-        try:
-            cls = getattr(simulation, cls_name)
-            globals()[cls_name] = cls
-        except AttributeError:
-            pass  # Class doesn't exist in this module
-
-if actuators:
+    'common': ('Component', 'Property', 'Storage', 'Array', 'StepFunction', 'ConsoleReporter'),
+    # Simulation classes
+    'simulation': ('Model', 'Manager', 'State', 'Body', 'PinJoint', 'PhysicalOffsetFrame',
+                   'Ellipsoid', 'Millard2012EquilibriumMuscle', 'PrescribedController',
+                   'InverseKinematicsSolver', 'InverseDynamicsSolver'),
     # Common actuator classes
-    for cls_name in ['Muscle', 'CoordinateActuator', 'PointActuator']:
-        try:
-            cls = getattr(actuators, cls_name)
-            globals()[cls_name] = cls
-        except AttributeError:
-            pass  # Class doesn't exist in this module
-
-if tools:
+    'actuators': ('Muscle', 'CoordinateActuator', 'PointActuator'),
     # Analysis tools
-    for cls_name in ['InverseKinematicsTool', 'InverseDynamicsTool', 'ForwardTool', 'AnalyzeTool']:
-        try:
-            cls = getattr(tools, cls_name)
-            globals()[cls_name] = cls
-        except AttributeError:
-            pass  # Class doesn't exist in this module
+    'tools': ('InverseKinematicsTool', 'InverseDynamicsTool', 'ForwardTool', 'AnalyzeTool'),
+}
+_CLASS_MAP = {cls_name: mod_name for mod_name, names in _REEXPORTS.items() for cls_name in names}
+
+
+def _reexport(mod, names):
+    """Copy the given names from a submodule into the package namespace."""
+    ns = vars(mod)
+    globals().update({n: ns[n] for n in names if n in ns})
+
+
+def _load_submodule(name):
+    """Import a SWIG submodule, caching None if it is unavailable."""
+    import importlib
+    try:
+        mod = importlib.import_module(f'.{name}', __name__)
+    except ImportError as e:
+        if name not in _OPTIONAL_SUBMODULES:
+            print(f"Warning: Could not import {name} module: {e}")
+        mod = None
+    globals()[name] = mod
+    return mod
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return _load_submodule(name)
+    if name in _CLASS_MAP:
+        mod_name = _CLASS_MAP[name]
+        mod = globals()[mod_name] if mod_name in globals() else _load_submodule(mod_name)
+        if mod is not None:
+            # Pull in the whole module's re-exports at once
+            _reexport(mod, _REEXPORTS[mod_name])
+            if name in globals():
+                return globals()[name]
+    if name == '__all__':
+        # Resolved on demand so unavailable modules/classes drop out of `import *`
+        # Names already resolved are read straight from the module dict; only
+        # the rest go through getattr (and so this __getattr__)
+        _g = globals()
+        module = sys.modules[__name__]
+        names = tuple(item for item in _ALL
+                      if (_g[item] if item in _g else getattr(module, item, None)) is not None)
+        _g['__all__'] = names
+        return names
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    # Re-exports are only dropped once their submodule is known to lack them
+    # (failed import or missing class); modules not loaded yet are not imported
+    _g = globals()
+    reexports = {cls_name for cls_name, mod_name in _CLASS_MAP.items()
+                 if mod_name not in _g
+                 or (_g[mod_name] is not None and hasattr(_g[mod_name], cls_name))}
+    return sorted(set(_g) | _LAZY | reexports | {'__all__'})
+
 
 # Import version information
 # Try to import from _version.py (generated during build), fallback to package metadata
@@ -164,16 +146,8 @@ except ImportError:
             __version__ = "0.0.0"  # Fallback version
             __opensim_version__ = "0.0.0"
 
-# Set up geometry path if available
-_geometry_path = os.path.join(_curFolder, 'Geometry')
-if os.path.exists(_geometry_path):
-    try:
-        ModelVisualizer.addDirToGeometrySearchPaths(_geometry_path)
-    except NameError:
-        pass  # ModelVisualizer not available
-
 # Define what's available when using 'from pyopensim import *'
-__all__ = [
+_ALL = (
     # Core modules
     'simbody', 'common', 'simulation', 'actuators', 'analyses', 'tools',
     # Optional modules (if available)
@@ -192,10 +166,10 @@ __all__ = [
     'InverseKinematicsTool', 'InverseDynamicsTool',
     'ForwardTool', 'AnalyzeTool',
     '__version__', '__opensim_version__'
-]
+)
 
-# Filter out None values from __all__ (for optional modules that failed to import)
-__all__ = [item for item in __all__ if globals().get(item) is not None]
+# __all__ itself is computed on demand by __getattr__, filtering out names
+# whose modules failed to import (optional modules, missing classes)
 
 # Exit handler to prevent segfaults during cleanup
 def _cleanup_opensim():
@@ -29,16 +29,16 @@ from .common import Component, Property, Storage, Array, StepFunction, ConsoleRe
 
 # Re-exported classes from simulation
 from .simulation import (
-    Model, 
-    Manager, 
-    State, 
-    Body, 
-    PinJoint, 
+    Model,
+    Manager,
+    State,
+    Body,
+    PinJoint,
     PhysicalOffsetFrame,
-    Ellipsoid, 
-    Millard2012EquilibriumMuscle, 
+    Ellipsoid,
+    Millard2012EquilibriumMuscle,
     PrescribedController,
-    InverseKinematicsSolver, 
+    InverseKinematicsSolver,
     InverseDynamicsSolver
 )
 
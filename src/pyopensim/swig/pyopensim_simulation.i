@@ -4,4 +4,15 @@
 %feature("autodoc", "3");
 
 // Include the original OpenSim simulation interface file
-%include "python_simulation.i"
\ No newline at end of file
+%include "python_simulation.i"
+
+// Register the bundled Geometry folder with the visualizer. This lives in the
+// module itself so it runs however simulation is imported (pyopensim.Model,
+// import pyopensim.simulation, from pyopensim.simulation import ...)
+%pythoncode %{
+import os as _os
+_geometry_path = _os.path.join(_os.path.dirname(_os.path.abspath(__file__)), 'Geometry')
+if _os.path.isdir(_geometry_path):
+    ModelVisualizer.addDirToGeometrySearchPaths(_geometry_path)
+del _os
+%}
@@ -0,0 +1,107 @@
+"""
+Tests for the stub post-processing in scripts/python/generate_stubs.py
+"""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+import generate_stubs  # noqa: E402
+
+
+@pytest.mark.parametrize("line, expected", [
+    # selfX split
+    ("    def f(selfX: int) -> None: ...\n",
+     "    def f(self, X: int) -> None: ...\n"),
+    # duplicate self
+    ("    def f(self, self, x: int) -> None: ...\n",
+     "    def f(self, x: int) -> None: ...\n"),
+    # empty parameter list
+    ("    def f() -> None: ...\n",
+     "    def f(self) -> None: ...\n"),
+    # trailing comma
+    ("    def f(self, ) -> None: ...\n",
+     "    def f(self) -> None: ...\n"),
+    # @overload run together with def
+    ("    @overload    def f(self, a: int) -> int: ...\n",
+     "    @overload\n    def f(self, a: int) -> int: ...\n"),
+])
+def test_line_fix_kinds(line, expected):
+    """Test that each line-level fix produces the expected output."""
+    fixed, n = generate_stubs._apply_line_fixes(line)
+    assert fixed == expected
+    assert n > 0
+
+def test_missing_any_import():
+    """Test that Any is imported when used below the header."""
+    stub = "import enum\n" + "\n" * 10 + "def f(x: Any) -> None: ...\n"
+    out = io.StringIO()
+    n = generate_stubs._stream_fixes(io.StringIO(stub), out)
+    assert out.getvalue() == "from typing import Any\n" + stub
+    assert n == 1
+
+def test_self_method_name_not_split():
+    """Test that method names starting with 'self' are left alone."""
+    line = "    def selfCollide(self) -> bool: ...\n"
+    assert generate_stubs._apply_line_fixes(line) == (line, 0)
+
+def test_newline_not_swallowed():
+    """Test that a duplicate self at the end of a line keeps its newline."""
+    fixed, n = generate_stubs._apply_line_fixes("    def f(self, self,\n")
+    assert fixed == "    def f(self, \n"
+    assert n == 1
+
+def test_nested_class_overload_unchanged():
+    """Test that correctly placed overloads in nested classes keep their indent.
+
+    The old whole-file pass matched '@overload' and 'def' across the newline
+    and re-indented these to 4 spaces; fixes are now line-local.
+    """
+    stub = (
+        "class Outer:\n"
+        "    class Inner:\n"
+        "        @overload\n"
+        "        def f(self, a: int) -> int: ...\n"
+        "        @overload\n"
+        "        def f(self, a: str) -> str: ...\n"
+    )
+    out = io.StringIO()
+    n = generate_stubs._stream_fixes(io.StringIO(stub), out)
+    assert out.getvalue() == stub
+    assert n == 0
+
+@pytest.mark.parametrize("line", [
+    "    def f(self) -> None: ...\n",
+    "    def f(self, a: int, b: str) -> None: ...\n",
+    "    def selfCollide(self) -> bool: ...\n",
+    "    @overload\n",
+    "    def f(self, x: Tuple[int, ]) -> None: ...\n",
+    "    x: Callable[[], None]\n",
+    "    def f(selfX, self, self, y) -> None: ...\n",
+    "    def f(self, self, ) -> None: ...\n",
+    "    @overload    def f() -> int: ...\n",
+    "    def f(self, ) -> Callable[[], None]: ...\n",
+    "    y = selfish(a, b)\n",
+    "    def g(a, self, self, b) -> None: ...\n",
+])
+def test_change_count_matches_change(line):
+    """Test that a nonzero fix count is reported exactly when the line changes."""
+    fixed, n = generate_stubs._apply_line_fixes(line)
+    assert (n > 0) == (fixed != line)
+
+@pytest.mark.parametrize("stub_file", sorted(
+    p for p in (REPO_ROOT / "src" / "pyopensim").glob("*.pyi") if p.name != "__init__.pyi"
+), ids=lambda p: p.name)
+def test_checked_in_stubs_need_no_fixes(stub_file):
+    """Test that the checked-in stubs pass the cheap probe as already clean."""
+    assert not generate_stubs._stub_needs_fixes(stub_file)
+
+def test_stub_needs_fixes(tmp_path):
+    """Test that the probe flags a stub with a malformed signature."""
+    stub_file = tmp_path / "broken.pyi"
+    stub_file.write_text("class A:\n    def f(selfX: int) -> None: ...\n")
+    assert generate_stubs._stub_needs_fixes(stub_file)